@@ -19,65 +19,88 @@ Environment variable outputs (via GITHUB_ENV) for GitHub Actions:
 """
 
 from pathlib import Path
+import functools
 import os
 import re
-import subprocess
-import sys
 import textwrap
+import urllib.parse
+import urllib.request
+
+from packaging.tags import sys_tags
+from packaging.utils import (
+    InvalidWheelFilename,
+    canonicalize_name,
+    parse_wheel_filename,
+)
 
 REPO_ROOT = Path(__file__).parent.parent
 REQUIREMENTS_IREE_PINNED_PATH = REPO_ROOT / "requirements-iree-pinned.txt"
+IREE_PIP_RELEASE_LINKS_URL = "https://iree.dev/pip-release-links.html"
+
+# Matches pins like `iree-base-compiler==3.2.0rc20250109`, capturing the
+# package name and version.
+PINNED_VERSION_REGEX = re.compile(r"^([\w.-]+)==(\S+)", re.MULTILINE)
+# Matches wheel filenames like
+# `iree_base_compiler-3.2.0rc20250109-cp311-cp311-manylinux_2_28_x86_64.whl`
+# in the links and text of the release page.
+WHEEL_FILENAME_REGEX = re.compile(r"[^/\"'<>\s]+\.whl")
+# Timeout in seconds for fetching the release page. A stalled connection
+# raises instead of hanging the workflow.
+FETCH_TIMEOUT_SECONDS = 60
 
 
 def get_current_version(package_name):
-    with open(REQUIREMENTS_IREE_PINNED_PATH, "r") as f:
-        text = f.read()
-        return re.findall(f"{package_name}==(.*)", text)[0]
+    text = REQUIREMENTS_IREE_PINNED_PATH.read_text()
+    pinned_versions = dict(PINNED_VERSION_REGEX.findall(text))
+    return pinned_versions[package_name]
+
 
+@functools.lru_cache(maxsize=None)
+def fetch_find_links_page(url):
+    # Fetched once and shared by every package lookup.
+    print(f"Fetching package index page '{url}'\n")
+    with urllib.request.urlopen(url, timeout=FETCH_TIMEOUT_SECONDS) as response:
+        return response.read().decode("utf-8")
 
-def get_latest_version(package_name, extra_pip_args=[]):
+
+def get_latest_versions(package_names, find_links_url=IREE_PIP_RELEASE_LINKS_URL):
     print("\n-------------------------------------------------------------------------")
-    print(f"Finding latest available package version for package '{package_name}'\n")
+    print(f"Finding latest available package versions for packages {package_names}\n")
 
-    # This queries the pip index to get the latest version.
-    #
-    # This doesn't require downloading or installing, so it should be more
-    # portable across operating systems than other approaches.
+    # This scrapes the release page (the same page that would be passed to
+    # `pip install --find-links`) for wheel filenames, which avoids the cost
+    # and unstable output of running `pip index versions` in a subprocess.
+    # All packages are looked up from a single fetch of the page.
     #
-    # Note: the `index` subcommand is experimental. We could instead:
-    #   * Install (into a venv) then check what was installed with `--report`,
-    #     `pip freeze`, or regex parsing (as in `get_current_version()` above)
-    #   * Download then check what was downloaded
-    #   * Scrape the package index and/or release page (https://iree.dev/pip-release-links.html)
-    subprocess_args = [
-        sys.executable,
-        "-m",
-        "pip",
-        "index",
-        "versions",
-        package_name,
-        "--disable-pip-version-check",
-    ]
-    subprocess_args.extend(extra_pip_args)
-
-    print(f"Running command:\n  {subprocess.list2cmdline(subprocess_args)}\n")
-    result = subprocess.run(subprocess_args, stdout=subprocess.PIPE)
-    output = result.stdout.decode("utf-8")
-    print(f"Command output:\n{textwrap.indent(output, '  ')}")
-
-    # Search for text like `iree-base-compiler (3.2.0rc20250109)` within the
-    # multiple lines of output from the command.
-    # WARNING: The output from `pip index` is UNSTABLE and UNSTRUCTURED, but
-    # this seems to work using Python 3.11.2 and pip 22.3.1.
-    version_search_regex = re.compile(f"{package_name}\s\((.*)\)")
-    matches = version_search_regex.match(output)
-    if not matches:
-        raise RuntimeError("Failed to find a package version using regex")
-    version = matches.groups()[0]
-    print(
-        f"Found package version for '{package_name}' in output using regex: '{version}'"
-    )
-    return version
+    # Like `pip index versions`, only versions with a wheel that is installable
+    # by the running interpreter are considered, so a nightly that is missing
+    # some platforms is not picked up.
+    html = fetch_find_links_page(find_links_url)
+    supported_tags = set(sys_tags())
+    versions_by_name = {}
+    for wheel_filename in set(WHEEL_FILENAME_REGEX.findall(html)):
+        try:
+            name, version, _, tags = parse_wheel_filename(
+                urllib.parse.unquote(wheel_filename)
+            )
+        except InvalidWheelFilename:
+            continue
+        if tags.isdisjoint(supported_tags):
+            continue
+        versions_by_name.setdefault(name, set()).add(version)
+
+    latest_versions = {}
+    for package_name in package_names:
+        versions = versions_by_name.get(canonicalize_name(package_name))
+        if not versions:
+            raise RuntimeError(
+                f"Failed to find any compatible versions for '{package_name}' "
+                f"at '{find_links_url}'"
+            )
+        version = str(max(versions))
+        print(f"Found latest package version for '{package_name}': '{version}'")
+        latest_versions[package_name] = version
+    return latest_versions
 
 
 def main():
@@ -86,13 +109,9 @@ def main():
     current_compiler_version = get_current_version("iree-base-compiler")
     current_runtime_version = get_current_version("iree-base-runtime")
 
-    nightly_pip_args = [
-        "--pre",
-        "--find-links",
-        "https://iree.dev/pip-release-links.html",
-    ]
-    latest_compiler_version = get_latest_version("iree-base-compiler", nightly_pip_args)
-    latest_runtime_version = get_latest_version("iree-base-runtime", nightly_pip_args)
+    latest_versions = get_latest_versions(["iree-base-compiler", "iree-base-runtime"])
+    latest_compiler_version = latest_versions["iree-base-compiler"]
+    latest_runtime_version = latest_versions["iree-base-runtime"]
 
     print("\n-------------------------------------------------------------------------")
     print("Current versions:")
@@ -127,23 +146,19 @@ def main():
 
     print("\n-------------------------------------------------------------------------")
     print(f"Editing version pins in '{REQUIREMENTS_IREE_PINNED_PATH}'")
-    with open(REQUIREMENTS_IREE_PINNED_PATH, "r") as f:
-        text = f.read()
-        print(f"Original text:\n{textwrap.indent(text, '  ')}\n")
-
-        text = re.sub(
-            "iree-base-compiler==.*",
-            f"iree-base-compiler=={latest_compiler_version}",
-            text,
-        )
-        text = re.sub(
-            "iree-base-runtime==.*",
-            f"iree-base-runtime=={latest_runtime_version}",
-            text,
-        )
-        print(f"New text:\n{textwrap.indent(text, '  ')}\n")
-    with open(REQUIREMENTS_IREE_PINNED_PATH, "w") as f:
-        f.write(text)
+    text = REQUIREMENTS_IREE_PINNED_PATH.read_text()
+    print(f"Original text:\n{textwrap.indent(text, '  ')}\n")
+
+    # Update all pins in a single pass, leaving any other pins unchanged.
+    new_versions = {
+        "iree-base-compiler": latest_compiler_version,
+        "iree-base-runtime": latest_runtime_version,
+    }
+    text = PINNED_VERSION_REGEX.sub(
+        lambda m: f"{m.group(1)}=={new_versions.get(m.group(1), m.group(2))}", text
+    )
+    print(f"New text:\n{textwrap.indent(text, '  ')}\n")
+    REQUIREMENTS_IREE_PINNED_PATH.write_text(text)
 
     print("-------------------------------------------------------------------------")
     print("Edits complete")
@@ -25,6 +25,7 @@ def get_evoformer_kernel(
     v_dim: tuple[int, int],
     mfma_variant: MMAType,
     datatype: DataType,
+    v_layout: str = "b_bn_n_h_k2",
 ):
     assert datatype in [tkl.f16, tkl.bf16], f"Unsupported datatype: {datatype}"
 
@@ -94,7 +95,7 @@ def get_evoformer_kernel(
         inputs={B: i, BN: j, H: k, K2: l, K1: m},
         outputs={B: i, BN: j, H: k, K2: l, K1: m},
     )
-    # [B, BN, N, H, K2] -> [B, BN, H, N, K2]
+    # [B, BN, K2, H, N] or [B, BN, N, H, K2] -> [B, BN, H, N, K2]
     v_mapping = tkw.IndexMapping(
         num_iterators=5,
         inputs={B: i, BN: j, H: k, N: l, K2: m},
@@ -107,11 +108,20 @@ def get_evoformer_kernel(
         outputs={B: i, BN: j, H: k, N: l, M: m},
     )
 
+    # V is read through v_mapping, so either layout can be consumed directly
+    # without permuting it on the host.
+    if v_layout == "b_bn_k2_h_n":
+        v_type = tkl.Memory[B, BN, K2, H, N, ADDRESS_SPACE, datatype]
+    elif v_layout == "b_bn_n_h_k2":
+        v_type = tkl.Memory[B, BN, N, H, K2, ADDRESS_SPACE, datatype]
+    else:
+        raise ValueError(f"Unsupported v layout: {v_layout}")
+
     @tkw.wave(constraints)
     def evoformer_fwd(
         q: tkl.Memory[B, BN, M, H, K1, GLOBAL_ADDRESS_SPACE, datatype],
         k: tkl.Memory[B, BN, K2, H, K1, ADDRESS_SPACE, datatype],
-        v: tkl.Memory[B, BN, N, H, K2, ADDRESS_SPACE, datatype],
+        v: v_type,
         mask: tkl.Memory[B, BN, K2, GLOBAL_ADDRESS_SPACE, datatype],
         bias: tkl.Memory[B, H, M, K2, GLOBAL_ADDRESS_SPACE, datatype],
         c: tkl.Memory[B, BN, M, H, N, GLOBAL_ADDRESS_SPACE, datatype],
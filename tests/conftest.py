@@ -36,6 +36,12 @@ def pytest_configure(config):
     config.addinivalue_line(
         "markers", "validate_only: validation test, never runs with '--runperf'"
     )
+    config.addinivalue_line(
+        "markers", "require_cdna2: test requires a CDNA2 (gfx90*) default device"
+    )
+    config.addinivalue_line(
+        "markers", "require_cdna3: test requires a CDNA3 (gfx94*) default device"
+    )
 
 
 def _set_default_device(config):
@@ -77,3 +83,25 @@ def pytest_collection_modifyitems(config, items):
         else:
             if is_perf_only:
                 item.add_marker(pytest.mark.skip("skip perf test"))
+
+
+# Markers for tests that need a specific default device architecture, mapped to
+# the required arch prefix and the architecture name.
+_ARCH_MARKERS = {
+    "require_cdna2": ("gfx90", "CDNA2"),
+    "require_cdna3": ("gfx94", "CDNA3"),
+}
+
+
+def pytest_runtest_setup(item):
+    # Query the device only for tests that are actually run, not at import or
+    # collection time. Tests already skipped (e.g. e2e tests without
+    # '--run-e2e') never reach this point.
+    for marker, (arch_prefix, arch_name) in _ARCH_MARKERS.items():
+        if not _has_marker(item, marker):
+            continue
+
+        from iree.turbine.kernel.wave.utils import get_default_arch
+
+        if arch_prefix not in get_default_arch():
+            pytest.skip(f"Default device is not {arch_name}")
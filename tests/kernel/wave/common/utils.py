@@ -6,18 +6,15 @@
 
 import pytest
 import os
-from iree.turbine.kernel.wave.utils import (
-    get_default_arch,
-)
 
 require_e2e = pytest.mark.require_e2e
-require_cdna3 = pytest.mark.skipif(
-    "gfx94" not in get_default_arch(), reason="Default device is not CDNA3"
-)
+# Checked against the default device only when the test runs, see conftest.py.
+require_cdna2 = pytest.mark.require_cdna2
+require_cdna3 = pytest.mark.require_cdna3
 # Whether to dump the generated MLIR module.
-dump_generated_mlir = int(os.environ.get("WAVE_DUMP_MLIR", 0))
+dump_generated_mlir = bool(int(os.environ.get("WAVE_DUMP_MLIR", 0)))
 # Whether to use scheduling group barriers (needs LLVM fix).
-enable_scheduling_barriers = int(os.environ.get("WAVE_USE_SCHED_BARRIERS", 0))
+enable_scheduling_barriers = bool(int(os.environ.get("WAVE_USE_SCHED_BARRIERS", 0)))
 
 # Add test shapes for validation and performance testing.
 perf_test = lambda *a: pytest.param(*a, marks=pytest.mark.perf_only)
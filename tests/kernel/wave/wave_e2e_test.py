@@ -13,7 +13,6 @@ from iree.turbine.kernel.lang.global_symbols import *
 from iree.turbine.kernel.wave.iree_utils import generate_iree_ref
 from iree.turbine.kernel.wave.utils import (
     ceildiv,
-    get_default_arch,
     get_default_run_config,
     get_default_scheduling_params,
     to_default_device,
@@ -29,11 +28,11 @@ import sympy
 import os
 import torch
 import json
-
-require_e2e = pytest.mark.require_e2e
-require_cdna3 = pytest.mark.skipif(
-    "gfx94" not in get_default_arch(), reason="Default device is not CDNA3"
+from .common.utils import (
+    require_e2e,
+    require_cdna3,
 )
+
 default_test_shapes = [
     (1, 27),
     (111, 813),
@@ -15,7 +15,6 @@ from iree.turbine.kernel.lang.global_symbols import *
 from iree.turbine.kernel.wave.iree_utils import generate_iree_ref
 from iree.turbine.kernel.wave.utils import (
     get_default_run_config,
-    get_default_arch,
     get_default_scheduling_params,
     get_mfma_load_elems_per_thread,
     get_mfma_store_elems_per_thread,
@@ -28,18 +27,16 @@ import os
 import json
 from torch.testing import assert_close
 from enum import Enum
-
-require_e2e = pytest.mark.require_e2e
-require_cdna2 = pytest.mark.skipif(
-    "gfx90" not in get_default_arch(), reason="Default device is not CDNA2"
-)
-require_cdna3 = pytest.mark.skipif(
-    "gfx94" not in get_default_arch(), reason="Default device is not CDNA3"
+from .common.utils import (
+    require_e2e,
+    require_cdna2,
+    require_cdna3,
 )
+
 # Whether to dump the generated MLIR module.
-test_dump_generated_mlir = int(os.environ.get("WAVE_DUMP_MLIR", 0))
+test_dump_generated_mlir = bool(int(os.environ.get("WAVE_DUMP_MLIR", 0)))
 # Whether to use scheduling group barriers (needs LLVM fix).
-enable_scheduling_barriers = int(os.environ.get("WAVE_USE_SCHED_BARRIERS", 0))
+enable_scheduling_barriers = bool(int(os.environ.get("WAVE_USE_SCHED_BARRIERS", 0)))
 
 # Add test shapes for validation and performance testing.
 perf_test = lambda *a: pytest.param(*a, marks=pytest.mark.perf_only)